@@ -12,3 +12,11 @@ class GeneratedReportAdmin(admin.ModelAdmin):
     list_display = ('student_id', 'namespace', 'report_task', 'content_type', 'generated_at')
     list_filter = ('content_type', 'generated_at')
     search_fields = ('student_id', 'namespace', 'report_task__task_id')
+    list_select_related = ('report_task',)
+
+    def get_queryset(self, request):
+        # Skip the compressed content column; ReportTask.__str__ needs task_id and status.
+        return super().get_queryset(request).select_related('report_task').only(
+            'id', 'student_id', 'namespace', 'content_type', 'generated_at',
+            'report_task__task_id', 'report_task__status'
+        )
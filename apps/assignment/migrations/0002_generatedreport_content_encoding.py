@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-14 12:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignment', '0001_initial'),
+    ]
+
+    operations = [
+        # Reports stored before this migration were compressed with zlib.
+        migrations.AddField(
+            model_name='generatedreport',
+            name='content_encoding',
+            field=models.CharField(choices=[('zlib', 'zlib'), ('zstd', 'Zstandard')], default='zlib', help_text='The compression codec used for the report content.', max_length=10, verbose_name='Content Encoding'),
+        ),
+        migrations.AlterField(
+            model_name='generatedreport',
+            name='content_encoding',
+            field=models.CharField(choices=[('zlib', 'zlib'), ('zstd', 'Zstandard')], default='zstd', help_text='The compression codec used for the report content.', max_length=10, verbose_name='Content Encoding'),
+        ),
+        migrations.AlterField(
+            model_name='generatedreport',
+            name='content',
+            field=models.BinaryField(blank=True, help_text='Binary content of the report (e.g., PDF or HTML as bytes), compressed with the content encoding.', null=True, verbose_name='Report Content'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-14 12:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignment', '0002_generatedreport_content_encoding'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='generatedreport',
+            name='assignment__student_28dd8d_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='generatedreport',
+            name='assignment__namespa_55cd6a_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='generatedreport',
+            name='assignment__report__d8166c_idx',
+        ),
+        migrations.AddIndex(
+            model_name='generatedreport',
+            index=models.Index(fields=['report_task', 'content_type'], include=('id', 'student_id', 'namespace', 'generated_at', 'file_size'), name='genrpt_task_ctype_cover'),
+        ),
+    ]
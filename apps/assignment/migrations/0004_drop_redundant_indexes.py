@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-14 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignment', '0003_generatedreport_covering_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='generatedreport',
+            name='content_type',
+            field=models.CharField(choices=[('html', 'HTML'), ('pdf', 'PDF')], help_text='The type of content in the report, either HTML or PDF.', max_length=10, verbose_name='Report Type'),
+        ),
+        migrations.AlterField(
+            model_name='generatedreport',
+            name='generated_at',
+            field=models.DateTimeField(auto_now_add=True, help_text='Timestamp when the report was generated.', verbose_name='Generated Time'),
+        ),
+        migrations.AlterField(
+            model_name='generatedreport',
+            name='namespace',
+            field=models.CharField(help_text='The namespace associated with the report.', max_length=255, verbose_name='Namespace'),
+        ),
+        migrations.AlterField(
+            model_name='generatedreport',
+            name='student_id',
+            field=models.CharField(help_text='The unique ID of the student.', max_length=255, verbose_name='Student ID'),
+        ),
+        migrations.AlterField(
+            model_name='reporttask',
+            name='report_type',
+            field=models.CharField(choices=[('html', 'HTML'), ('pdf', 'PDF')], default='html', help_text='The type of the report being generated (either HTML or PDF).', max_length=10, verbose_name='Report Type'),
+        ),
+        migrations.AlterField(
+            model_name='reporttask',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('STARTED', 'Started'), ('SUCCESS', 'Success'), ('FAILURE', 'Failure'), ('RETRY', 'Retry'), ('REVOKED', 'Revoked')], default='PENDING', help_text='The current status of the report generation task.', max_length=20, verbose_name='Task Status'),
+        ),
+    ]
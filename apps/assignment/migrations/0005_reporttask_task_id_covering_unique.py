@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-14 12:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignment', '0004_drop_redundant_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reporttask',
+            name='task_id',
+            field=models.CharField(help_text='Unique identifier for the task.', max_length=255, verbose_name='Task ID'),
+        ),
+        migrations.AddConstraint(
+            model_name='reporttask',
+            constraint=models.UniqueConstraint(fields=('task_id',), include=('status', 'report_type'), name='rtask_taskid_cover'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-14 12:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignment', '0005_reporttask_task_id_covering_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reporttask',
+            name='payload',
+            field=models.BinaryField(blank=True, help_text='Validated student data as zstd-compressed JSON; cleared once the task finishes.', null=True, verbose_name='Payload'),
+        ),
+    ]
@@ -14,29 +14,37 @@ class ReportType(models.TextChoices):
     HTML = 'html', _('HTML')
     PDF = 'pdf', _('PDF')
 
+class ContentEncoding(models.TextChoices):
+    ZLIB = 'zlib', _('zlib')
+    ZSTD = 'zstd', _('Zstandard')
+
+class _NoBlobManager(models.Manager):
+    def __init__(self, *blob_fields):
+        super().__init__()
+        self.blob_fields = blob_fields
+
+    def get_queryset(self):
+        return super().get_queryset().defer(*self.blob_fields)
+
 class ReportTask(models.Model):
     task_id = models.CharField(
         max_length=255,
-        unique=True,
         verbose_name=_("Task ID"),
-        help_text=_("Unique identifier for the task."),
-        db_index=True
+        help_text=_("Unique identifier for the task.")
     )
     status = models.CharField(
         max_length=20,
         choices=Status.choices,
         default=Status.PENDING,
         verbose_name=_("Task Status"),
-        help_text=_("The current status of the report generation task."),
-        db_index=True
+        help_text=_("The current status of the report generation task.")
     )
     report_type = models.CharField(
         max_length=10,
         choices=ReportType.choices,
         default=ReportType.HTML,
         verbose_name=_("Report Type"),
-        help_text=_("The type of the report being generated (either HTML or PDF)."),
-        db_index=True
+        help_text=_("The type of the report being generated (either HTML or PDF).")
     )
     error_message = models.TextField(
         null=True,
@@ -44,6 +52,12 @@ class ReportTask(models.Model):
         verbose_name=_("Error Message"),
         help_text=_("Optional error message if task fails.")
     )
+    payload = models.BinaryField(
+        null=True,
+        blank=True,
+        verbose_name=_("Payload"),
+        help_text=_("Validated student data as zstd-compressed JSON; cleared once the task finishes.")
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name=_("Creation Time"),
@@ -56,6 +70,9 @@ class ReportTask(models.Model):
         help_text=_("Timestamp when the task status was last updated.")
     )
 
+    objects = _NoBlobManager('payload')
+    all_objects = models.Manager()
+
     def __str__(self):
         return f"Task {self.task_id} - {self.get_status_display()}"
 
@@ -66,6 +83,14 @@ class ReportTask(models.Model):
         indexes = [
             models.Index(fields=['status', 'report_type']),
         ]
+        constraints = [
+            # Unique index on task_id that also covers status polling lookups.
+            models.UniqueConstraint(
+                fields=['task_id'],
+                include=['status', 'report_type'],
+                name='rtask_taskid_cover'
+            ),
+        ]
 
 class GeneratedReport(models.Model):
     id = models.UUIDField(
@@ -85,33 +110,36 @@ class GeneratedReport(models.Model):
     student_id = models.CharField(
         max_length=255,
         verbose_name=_("Student ID"),
-        help_text=_("The unique ID of the student."),
-        db_index=True
+        help_text=_("The unique ID of the student.")
     )
     namespace = models.CharField(
         max_length=255,
         verbose_name=_("Namespace"),
-        help_text=_("The namespace associated with the report."),
-        db_index=True
+        help_text=_("The namespace associated with the report.")
     )
     content = models.BinaryField(
         null=True,
         blank=True,
         verbose_name=_("Report Content"),
-        help_text=_("Binary content of the report (e.g., PDF or HTML as bytes), compressed using zlib.")
+        help_text=_("Binary content of the report (e.g., PDF or HTML as bytes), compressed with the content encoding.")
+    )
+    content_encoding = models.CharField(
+        max_length=10,
+        choices=ContentEncoding.choices,
+        default=ContentEncoding.ZSTD,
+        verbose_name=_("Content Encoding"),
+        help_text=_("The compression codec used for the report content.")
     )
     content_type = models.CharField(
         max_length=10,
         choices=ReportType.choices,
         verbose_name=_("Report Type"),
-        help_text=_("The type of content in the report, either HTML or PDF."),
-        db_index=True
+        help_text=_("The type of content in the report, either HTML or PDF.")
     )
     generated_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name=_("Generated Time"),
-        help_text=_("Timestamp when the report was generated."),
-        db_index=True
+        help_text=_("Timestamp when the report was generated.")
     )
     file_size = models.PositiveIntegerField(
         null=True,
@@ -120,21 +148,21 @@ class GeneratedReport(models.Model):
         help_text=_("Size of the compressed report content in bytes.")
     )
 
+    objects = _NoBlobManager('content')
+    all_objects = models.Manager()
+
     def __str__(self):
         return f"Generated {self.content_type} Report for {self.student_id}"
 
-    def save(self, *args, **kwargs):
-        if self.content:
-            self.file_size = len(self.content)
-        super().save(*args, **kwargs)
-
     class Meta:
         verbose_name = _("Generated Report")
         verbose_name_plural = _("Generated Reports")
         ordering = ['-generated_at']
         indexes = [
-            models.Index(fields=['student_id']),
-            models.Index(fields=['namespace']),
-            models.Index(fields=['report_task', 'content_type']),
+            models.Index(
+                fields=['report_task', 'content_type'],
+                include=['id', 'student_id', 'namespace', 'generated_at', 'file_size'],
+                name='genrpt_task_ctype_cover'
+            ),
             models.Index(fields=['student_id', 'namespace']),
         ]
@@ -1,6 +1,6 @@
 from typing import List, Literal
 from datetime import datetime
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, field_validator
 
 class EventSchema(BaseModel):
     type: Literal["saved_code", "submission"] = Field(
@@ -16,17 +16,6 @@ class EventSchema(BaseModel):
         description="Unit ID associated with the event",
         ge=0
     )
-    
-    @validator('created_time', pre=True)
-    def parse_datetime(cls, value):
-        if isinstance(value, str):
-            if value.endswith('Z'):
-                value = value[:-1] + '+00:00'
-            try:
-                return datetime.fromisoformat(value)
-            except ValueError:
-                raise ValueError(f"Invalid datetime format: {value}")
-        return value
 
 
 class StudentSchema(BaseModel):
@@ -47,14 +36,22 @@ class StudentSchema(BaseModel):
         description="List of events associated with the student"
     )
     
-    @validator('events')
+    @field_validator('namespace', 'student_id')
+    @classmethod
+    def not_blank(cls, v):
+        if not v.strip():
+            raise ValueError("Value cannot be blank")
+        return v
+
+    @field_validator('events')
+    @classmethod
     def events_not_empty(cls, v):
         if not v:
             raise ValueError("At least one event is required")
         return v
     
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "namespace": "ns_example",
                 "student_id": "00a9a76518624b02b0ed57263606fc26",
@@ -72,3 +69,7 @@ class StudentSchema(BaseModel):
                 ]
             }
         }
+    )
+
+
+StudentListAdapter = TypeAdapter(List[StudentSchema])
@@ -1,117 +1,224 @@
+import os
+import base64
 import logging
-from celery import shared_task
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from celery import chord, shared_task
+from celery.signals import worker_process_init
 from pydantic import ValidationError
 from celery.exceptions import MaxRetriesExceededError
+from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
+from django.utils import timezone
 
-from .schemas import StudentSchema
+from .schemas import StudentListAdapter, StudentSchema
 from .utils import (
     generate_html_report, 
     generate_pdf_report, 
     compress_report_content,
-    process_student_events
+    decompress_report_content,
+    process_student_events,
+    warm_pdf_renderer
 )
-from .models import ReportTask, Status, GeneratedReport, ReportType
+from .models import ReportTask, Status, GeneratedReport, ReportType, ContentEncoding
 
 logger = logging.getLogger(__name__)
 
+_REPORT_TYPE_VALUES = frozenset(choice.value for choice in ReportType)
+
+# How long a running task's status stays cached for status polls (seconds).
+TASK_STATUS_CACHE_TIMEOUT = 300
+
+
+def task_status_cache_key(task_id: str) -> str:
+    """
+    Returns the cache key under which a task's in-progress status is kept.
+
+    Args:
+        task_id (str): Celery task ID of the ReportTask.
+
+    Returns:
+        str: Cache key for the task status.
+    """
+    return f"rt:{task_id}"
+
+
+def get_cached_task_status(task_id: str):
+    """
+    Reads a task's cached in-progress status.
+
+    The cache is only an optimization, so errors are logged and treated as
+    a miss.
+
+    Args:
+        task_id (str): Celery task ID of the ReportTask.
+
+    Returns:
+        dict | None: Cached ``status`` and ``report_type``, or None.
+    """
+    try:
+        return cache.get(task_status_cache_key(task_id))
+    except Exception as e:
+        logger.warning(f"Could not read cached status for task {task_id}: {e}")
+        return None
+
+
+def cache_task_status(task_id: str, status: str, report_type: str, timeout: int = TASK_STATUS_CACHE_TIMEOUT):
+    """
+    Caches a task's in-progress status for status polls.
+
+    Errors are logged and ignored; the database stays the source of truth.
+
+    Args:
+        task_id (str): Celery task ID of the ReportTask.
+        status (str): In-progress status value.
+        report_type (str): Format of the requested reports.
+        timeout (int, optional): Seconds the entry stays cached.
+    """
+    try:
+        cache.set(task_status_cache_key(task_id), {"status": status, "report_type": report_type}, timeout)
+    except Exception as e:
+        logger.warning(f"Could not cache status for task {task_id}: {e}")
+
+
+def _render_one(student: StudentSchema, report_type: str):
+    """
+    Renders and compresses the report for a single student.
+
+    Runs in a worker process of the task's process pool, so it must stay at
+    module level and must not touch the database.
+
+    Args:
+        student (StudentSchema): Validated student data.
+        report_type (str): Desired format of report (e.g., 'html', 'pdf').
+
+    Returns:
+        tuple: (student_id, namespace, compressed_bytes); compressed_bytes is
+        None if the report could not be generated.
+    """
+    student_id = student.student_id
+    namespace = student.namespace
+
+    try:
+        _, event_order, _ = process_student_events(student)
+
+        if report_type == ReportType.HTML:
+            raw_report = generate_html_report(student, event_order)
+        else:
+            raw_report = generate_pdf_report(student, event_order)
+
+        return student_id, namespace, compress_report_content(raw_report)
+
+    except Exception as e:
+        logger.exception(f"Failed report for student {student_id}: {e}")
+        return student_id, namespace, None
+
+
+def _render_reports(students: list, report_type: str) -> list:
+    """
+    Renders and compresses the reports for all students.
+
+    Uses a process pool when the current process may start children.
+    Celery's prefork pool runs tasks in daemonic processes, which may not,
+    so there the reports are rendered serially and parallelism comes from
+    worker concurrency or the chord path.
+
+    Args:
+        students (list): Validated StudentSchema instances.
+        report_type (str): Desired format of report (e.g., 'html', 'pdf').
+
+    Returns:
+        list: (student_id, namespace, compressed_bytes) tuples as returned
+        by ``_render_one``, in the order of ``students``.
+    """
+    max_workers = min(os.cpu_count() or 1, len(students))
+
+    if multiprocessing.current_process().daemon or max_workers < 2:
+        return [_render_one(student, report_type) for student in students]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_render_one, students, repeat(report_type), chunksize=8))
+
+
+@worker_process_init.connect
+def _warm_renderers(**kwargs):
+    # Pay ReportLab's first-render setup once per worker child, before any task runs.
+    warm_pdf_renderer()
+
+
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
-def generate_report_task(self, task_pk: int, data: list, report_type: str):
+def generate_report_task(self, task_pk: int, report_type: str, data=None):
     """
     Asynchronous Celery task to generate reports for student data.
 
     Args:
         task_pk (int): Primary key of the ReportTask model.
-        data (list): List of student data dictionaries.
         report_type (str): Desired format of report (e.g., 'html', 'pdf').
+        data (str | list, optional): JSON array of student data, or the equivalent
+            list of dictionaries. Defaults to the payload stored on the ReportTask.
 
     Returns:
         dict: Summary of the task outcome.
     """
     logger.info(f"Task {self.request.id} started for ReportTask ID: {task_pk}")
 
-    if report_type not in [choice.value for choice in ReportType]:
+    if report_type not in _REPORT_TYPE_VALUES:
         error_msg = f"Invalid report_type: {report_type}"
         logger.error(error_msg)
-        _update_task_status(task_pk, Status.FAILURE, error_msg)
+        _update_task_status(task_pk, Status.FAILURE, error_msg, self.request.id)
         return {"status": "error", "message": error_msg}
 
-    try:
-        task = ReportTask.objects.get(pk=task_pk)
-        task.status = Status.STARTED
-        task.save(update_fields=["status"])
-    except ReportTask.DoesNotExist:
+    if not ReportTask.objects.filter(pk=task_pk).update(status=Status.STARTED, updated_at=timezone.now()):
         error_msg = f"ReportTask with ID {task_pk} not found."
         logger.error(error_msg)
         return {"status": "error", "message": error_msg}
 
     try:
-        students = [StudentSchema.model_validate(item) for item in data]
-        logger.info(f"Validated {len(students)} student entries.")
+        cache_task_status(self.request.id, Status.STARTED, report_type)
 
-        successful, failed = 0, 0
-
-        with transaction.atomic():
-            for student in students:
-                try:
-                    student_dict = student.model_dump()
-                    student_id = student.student_id
-                    namespace = student.namespace
-
-                    aliases, event_order, _ = process_student_events(student_dict)
-
-                    if report_type == ReportType.HTML:
-                        raw_report = generate_html_report(student_dict, event_order).encode('utf-8')
-                    else:
-                        raw_report = generate_pdf_report(student_dict, event_order)
-
-                    compressed = compress_report_content(raw_report)
-
-                    GeneratedReport.objects.create(
-                        report_task=task,
-                        student_id=student_id,
-                        namespace=namespace,
-                        content=compressed,
-                        content_type=report_type
-                    )
-
-                    successful += 1
-                    logger.info(f"Report generated for student {student_id}.")
-
-                except Exception as e:
-                    failed += 1
-                    logger.exception(f"Failed report for student {student.student_id}: {e}")
-
-        if successful and not failed:
-            task.status = Status.SUCCESS
-            logger.info(f"Task {task_pk} completed: all {successful} reports successful.")
-        elif successful:
-            task.status = Status.SUCCESS
-            task.error_message = f"{successful} reports succeeded, {failed} failed."
-            logger.warning(f"Task {task_pk} partially successful.")
+        if data is None:
+            payload = ReportTask.all_objects.filter(pk=task_pk).values_list('payload', flat=True).first()
+            if payload is None:
+                error_msg = f"ReportTask with ID {task_pk} has no stored payload."
+                logger.error(error_msg)
+                _update_task_status(task_pk, Status.FAILURE, error_msg, self.request.id)
+                return {"status": "error", "message": error_msg}
+            students = StudentListAdapter.validate_json(decompress_report_content(payload))
+        elif isinstance(data, str):
+            students = StudentListAdapter.validate_json(data)
         else:
-            task.status = Status.FAILURE
-            task.error_message = "All report generations failed."
-            logger.error(f"Task {task_pk} failed completely.")
+            students = StudentListAdapter.validate_python(data)
+        logger.info(f"Validated {len(students)} student entries.")
+
+        if settings.REPORT_RENDER_USE_CHORD:
+            payloads = StudentListAdapter.dump_python(students, mode='json')
+            # If a subtask raises or its worker is lost the callback never
+            # runs, so the errback has to record the failure instead.
+            chord(
+                render_student.s(payload, report_type) for payload in payloads
+            )(
+                finalize_reports.s(task_pk, report_type, self.request.id)
+                .on_error(fail_report_task.s(task_pk, self.request.id))
+            )
+            logger.info(f"Dispatched {len(payloads)} render subtasks for task {task_pk}.")
+            return {"status": Status.STARTED, "dispatched_reports": len(payloads)}
 
-        task.save(update_fields=["status", "error_message"] if task.error_message else ["status"])
+        results = _render_reports(students, report_type)
 
-        return {
-            "status": task.status,
-            "successful_reports": successful,
-            "failed_reports": failed
-        }
+        return _store_reports(task_pk, report_type, results, self.request.id)
 
     except ValidationError as ve:
         error_msg = f"Validation error: {ve.json()}"
         logger.error(error_msg)
-        _update_task_status(task_pk, Status.FAILURE, error_msg)
+        _update_task_status(task_pk, Status.FAILURE, error_msg, self.request.id)
         return {"status": "error", "message": error_msg}
 
     except MaxRetriesExceededError as mre:
         error_msg = f"Max retries exceeded: {mre}"
         logger.error(error_msg)
-        _update_task_status(task_pk, Status.FAILURE, error_msg)
+        _update_task_status(task_pk, Status.FAILURE, error_msg, self.request.id)
         return {"status": "error", "message": "Max retries exceeded"}
 
     except Exception as e:
@@ -121,11 +228,164 @@ def generate_report_task(self, task_pk: int, data: list, report_type: str):
         except MaxRetriesExceededError:
             error_msg = "Max retries exceeded on unexpected error."
             logger.error(error_msg)
-            _update_task_status(task_pk, Status.FAILURE, error_msg)
+            _update_task_status(task_pk, Status.FAILURE, error_msg, self.request.id)
             return {"status": "error", "message": error_msg}
 
 
-def _update_task_status(task_pk: int, status: str, error_message: str = None):
+def _store_reports(task_pk: int, report_type: str, results: list, task_id: str = None) -> dict:
+    """
+    Saves rendered reports and records the final task status.
+
+    Args:
+        task_pk (int): Primary key of the ReportTask model.
+        report_type (str): Format of the rendered reports.
+        results (list): (student_id, namespace, compressed_bytes) tuples as
+            returned by ``_render_one``.
+        task_id (str, optional): Celery task ID whose cached status to drop.
+
+    Returns:
+        dict: Summary of the task outcome.
+    """
+    reports = [
+        GeneratedReport(
+            report_task_id=task_pk,
+            student_id=student_id,
+            namespace=namespace,
+            content=compressed,
+            content_encoding=ContentEncoding.ZSTD,
+            content_type=report_type,
+            file_size=len(compressed)
+        )
+        for student_id, namespace, compressed in results
+        if compressed is not None
+    ]
+    successful = len(reports)
+    failed = len(results) - successful
+
+    error_message = None
+    if successful and not failed:
+        final_status = Status.SUCCESS
+        logger.info(f"Task {task_pk} completed: all {successful} reports successful.")
+    elif successful:
+        final_status = Status.SUCCESS
+        error_message = f"{successful} reports succeeded, {failed} failed."
+        logger.warning(f"Task {task_pk} partially successful.")
+    else:
+        final_status = Status.FAILURE
+        error_message = "All report generations failed."
+        logger.error(f"Task {task_pk} failed completely.")
+
+    with transaction.atomic():
+        GeneratedReport.objects.bulk_create(reports, batch_size=500)
+        ReportTask.objects.filter(pk=task_pk).update(**_status_fields(final_status, error_message))
+    _forget_task_status(task_id)
+
+    logger.info(f"Stored {successful} generated reports for task {task_pk}.")
+
+    return {
+        "status": final_status,
+        "successful_reports": successful,
+        "failed_reports": failed
+    }
+
+
+@shared_task
+def render_student(payload: dict, report_type: str) -> dict:
+    """
+    Celery subtask that renders and compresses the report for one student.
+
+    Args:
+        payload (dict): JSON-mode dump of a validated StudentSchema.
+        report_type (str): Desired format of report (e.g., 'html', 'pdf').
+
+    Returns:
+        dict: student_id, namespace and content_type of the report, with the
+        compressed content base64-encoded (None if rendering failed).
+    """
+    try:
+        student = StudentSchema.model_validate(payload)
+    except ValidationError as ve:
+        logger.error(f"Invalid render payload for student {payload.get('student_id')}: {ve}")
+        student_id, namespace, compressed = payload.get('student_id'), payload.get('namespace'), None
+    else:
+        student_id, namespace, compressed = _render_one(student, report_type)
+
+    return {
+        "student_id": student_id,
+        "namespace": namespace,
+        "content_type": report_type,
+        "content_b64": base64.b64encode(compressed).decode('ascii') if compressed is not None else None,
+    }
+
+
+@shared_task
+def finalize_reports(results: list, task_pk: int, report_type: str, task_id: str = None) -> dict:
+    """
+    Chord callback that stores the output of all render_student subtasks.
+
+    Args:
+        results (list): Return values of the render_student subtasks.
+        task_pk (int): Primary key of the ReportTask model.
+        report_type (str): Format of the rendered reports.
+        task_id (str, optional): Celery task ID of the generate_report_task
+            that dispatched the chord.
+
+    Returns:
+        dict: Summary of the task outcome.
+    """
+    try:
+        return _store_reports(task_pk, report_type, [
+            (
+                result["student_id"],
+                result["namespace"],
+                base64.b64decode(result["content_b64"]) if result["content_b64"] is not None else None,
+            )
+            for result in results
+        ], task_id)
+    except Exception as e:
+        error_msg = f"Failed to store generated reports: {e}"
+        logger.exception(error_msg)
+        _update_task_status(task_pk, Status.FAILURE, error_msg, task_id)
+        return {"status": "error", "message": error_msg}
+
+
+@shared_task
+def fail_report_task(request, exc, traceback, task_pk: int, task_id: str = None):
+    """
+    Chord error callback that marks the ReportTask as failed.
+
+    Args:
+        request: Context of the failed task.
+        exc (Exception): The exception that aborted the chord.
+        traceback: Traceback of the exception, if any.
+        task_pk (int): Primary key of the ReportTask model.
+        task_id (str, optional): Celery task ID of the generate_report_task
+            that dispatched the chord.
+    """
+    error_msg = f"Report rendering failed: {exc}"
+    logger.error(f"Chord for task {task_pk} failed: {exc}")
+    _update_task_status(task_pk, Status.FAILURE, error_msg, task_id)
+
+
+def _status_fields(status: str, error_message: str = None) -> dict:
+    """
+    Builds the ReportTask fields to write for a final status transition.
+
+    Args:
+        status (str): New status value.
+        error_message (str, optional): Error message if failed.
+
+    Returns:
+        dict: Field values for ``QuerySet.update``.
+    """
+    # Only final states are written here, so the stored payload is no longer needed.
+    fields = {"status": status, "payload": None, "updated_at": timezone.now()}
+    if error_message:
+        fields["error_message"] = error_message
+    return fields
+
+
+def _update_task_status(task_pk: int, status: str, error_message: str = None, task_id: str = None):
     """
     Updates the task's status and logs the outcome.
 
@@ -133,15 +393,33 @@ def _update_task_status(task_pk: int, status: str, error_message: str = None):
         task_pk (int): Primary key of the ReportTask.
         status (str): New status value.
         error_message (str, optional): Error message if failed.
+        task_id (str, optional): Celery task ID whose cached status to drop.
     """
     try:
-        task = ReportTask.objects.get(pk=task_pk)
-        task.status = status
-        if error_message:
-            task.error_message = error_message
-        task.save()
-        logger.info(f"Task {task_pk} updated to status: {status}")
-    except ReportTask.DoesNotExist:
-        logger.error(f"Failed to update status. ReportTask ID {task_pk} not found.")
+        if ReportTask.objects.filter(pk=task_pk).update(**_status_fields(status, error_message)):
+            _forget_task_status(task_id)
+            logger.info(f"Task {task_pk} updated to status: {status}")
+        else:
+            logger.error(f"Failed to update status. ReportTask ID {task_pk} not found.")
     except Exception as e:
         logger.exception(f"Error while updating task {task_pk} status: {e}")
+
+
+def _forget_task_status(task_id: str):
+    """
+    Drops the cached in-progress status once a task reaches a final state,
+    so the next status poll reads the result from the database.
+
+    The Celery task ID is passed in rather than read back from the
+    ReportTask, whose task_id is only saved after apply_async returns.
+
+    Args:
+        task_id (str): Celery task ID of the generate_report_task, if known.
+    """
+    if not task_id:
+        return
+    try:
+        cache.delete(task_status_cache_key(task_id))
+    except Exception as e:
+        # The final status is already committed; a stale entry expires on its own.
+        logger.warning(f"Could not clear cached status for task {task_id}: {e}")
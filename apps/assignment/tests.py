@@ -1,18 +1,38 @@
+import json
 import zlib
-from django.test import TestCase
+from datetime import datetime, timedelta, timezone
+from billiard.pool import Pool
+from concurrent.futures import ThreadPoolExecutor
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.urls import reverse
 from unittest.mock import patch, MagicMock
-from .models import ReportTask, GeneratedReport, Status, ReportType
+from celery import current_app
+from django.utils.translation import gettext_lazy
+from kombu.serialization import dumps as kombu_dumps, loads as kombu_loads, prepare_accept_content
+from core.renderers import ORJSONRenderer
+from .models import ReportTask, GeneratedReport, Status, ReportType, ContentEncoding
+from .schemas import StudentListAdapter, StudentSchema
+from .tasks import (
+    _render_reports,
+    fail_report_task,
+    finalize_reports,
+    generate_report_task,
+    render_student,
+    task_status_cache_key,
+)
+from .utils import compress_report_content, decompress_report_content, format_time, process_student_events
 
 
 def compress(data: bytes) -> bytes:
-    return zlib.compress(data)
+    return compress_report_content(data)
 
 
 class AssignmentAPITests(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.html_url = reverse('assignment:generate_report', args=['html'])
         self.pdf_url = reverse('assignment:generate_report', args=['pdf'])
@@ -37,6 +57,10 @@ class AssignmentAPITests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
         self.assertIn('task_id', response.data)
         self.assertEqual(response.data['task_id'], fake_result.id)
+        sent = mock_task.apply_async.call_args.kwargs['kwargs']
+        self.assertNotIn('data', sent)
+        task = ReportTask.all_objects.get(pk=sent['task_pk'])
+        self.assertEqual(json.loads(decompress_report_content(task.payload))[0]['student_id'], 'stu123')
 
     @patch('apps.assignment.views.generate_report_task')
     def test_generate_pdf_report_returns_202_and_task_id(self, mock_task):
@@ -49,6 +73,30 @@ class AssignmentAPITests(TestCase):
         self.assertIn('task_id', response.data)
         self.assertEqual(response.data['task_id'], fake_result.id)
 
+    @patch('apps.assignment.views.generate_report_task')
+    def test_generate_report_rejects_invalid_payload(self, mock_task):
+        payload = [{"namespace": "ns_example", "student_id": "stu123", "events": []}]
+
+        response = self.client.post(self.html_url, data=payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('details', response.data)
+        mock_task.apply_async.assert_not_called()
+
+    @patch('apps.assignment.views.generate_report_task')
+    def test_generate_report_rejects_malformed_json(self, mock_task):
+        response = self.client.post(self.html_url, data='[{"namespace": ', content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn('input', response.data['details'][0])
+        mock_task.apply_async.assert_not_called()
+
+    @patch('apps.assignment.views.compress_report_content', side_effect=ValueError('compression failed'))
+    @patch('apps.assignment.views.generate_report_task')
+    def test_generate_report_compression_failure_returns_500(self, mock_task, mock_compress):
+        response = self.client.post(self.html_url, data=self.sample_payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertEqual(response.data['error'], 'Failed to create report task')
+        mock_task.apply_async.assert_not_called()
+
     def test_report_status_pending(self):
         task = ReportTask.objects.create(task_id='t1', status=Status.PENDING, report_type=ReportType.HTML)
         url = reverse('assignment:report_status', args=[ReportType.HTML, task.task_id])
@@ -56,6 +104,28 @@ class AssignmentAPITests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
         self.assertEqual(response.data['status'], Status.PENDING)
 
+    def test_report_status_pending_is_served_from_cache(self):
+        task = ReportTask.objects.create(task_id='t4', status=Status.PENDING, report_type=ReportType.HTML)
+        url = reverse('assignment:report_status', args=[ReportType.HTML, task.task_id])
+        self.client.get(url)
+
+        ReportTask.objects.filter(pk=task.pk).update(status=Status.STARTED)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], Status.PENDING)
+
+    @patch('apps.assignment.tasks.cache')
+    def test_report_status_falls_back_to_database_without_cache(self, mock_cache):
+        mock_cache.get.side_effect = ConnectionError('cache down')
+        mock_cache.set.side_effect = ConnectionError('cache down')
+        task = ReportTask.objects.create(task_id='t11', status=Status.STARTED, report_type=ReportType.HTML)
+        url = reverse('assignment:report_status', args=[ReportType.HTML, task.task_id])
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], Status.STARTED)
+
     def test_report_status_success_no_reports(self):
         task = ReportTask.objects.create(task_id='t2', status=Status.SUCCESS, report_type=ReportType.HTML)
         url = reverse('assignment:report_status', args=[ReportType.HTML, task.task_id])
@@ -97,7 +167,58 @@ class AssignmentAPITests(TestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response['Content-Type'], 'text/html')
-        self.assertIn(b"<h2>Hello</h2>", response.content)
+        self.assertIn(b"<h2>Hello</h2>", b"".join(response.streaming_content))
+
+    def test_retrieve_report_is_served_from_cache(self):
+        task = ReportTask.objects.create(task_id='t4', status=Status.SUCCESS, report_type=ReportType.HTML)
+        rpt = GeneratedReport.objects.create(
+            report_task=task,
+            student_id='stu123',
+            namespace='ns',
+            content=compress(b"<h2>Cached</h2>"),
+            content_type=ReportType.HTML,
+        )
+        url = reverse('assignment:report_view', args=[task.task_id, rpt.id])
+        self.client.get(url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Disposition'], 'inline; filename="Report-stu123.html"')
+        self.assertEqual(b"".join(response.streaming_content), b"<h2>Cached</h2>")
+
+    @patch('apps.assignment.views.cache')
+    def test_retrieve_report_without_cache(self, mock_cache):
+        mock_cache.get.side_effect = ConnectionError('cache down')
+        mock_cache.set.side_effect = ConnectionError('cache down')
+        task = ReportTask.objects.create(task_id='t4', status=Status.SUCCESS, report_type=ReportType.HTML)
+        rpt = GeneratedReport.objects.create(
+            report_task=task,
+            student_id='stu123',
+            namespace='ns',
+            content=compress(b"<h2>Uncached</h2>"),
+            content_type=ReportType.HTML,
+        )
+        url = reverse('assignment:report_view', args=[task.task_id, rpt.id])
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b"".join(response.streaming_content), b"<h2>Uncached</h2>")
+
+    @patch('apps.assignment.views._REPORT_CACHE_MAX_SIZE', 8)
+    def test_large_report_is_not_cached(self):
+        task = ReportTask.objects.create(task_id='t4', status=Status.SUCCESS, report_type=ReportType.PDF)
+        rpt = GeneratedReport.objects.create(
+            report_task=task,
+            student_id='stu123',
+            namespace='ns',
+            content=compress(b"PDFDATA-LARGER-THAN-LIMIT"),
+            content_type=ReportType.PDF,
+        )
+        url = reverse('assignment:report_view', args=[task.task_id, rpt.id])
+        self.client.get(url)
+
+        self.assertIsNone(cache.get(f"rpt:{task.task_id}:{rpt.id}"))
 
     def test_retrieve_pdf_report(self):
         task = ReportTask.objects.create(task_id='t5', status=Status.SUCCESS, report_type=ReportType.PDF)
@@ -114,4 +235,249 @@ class AssignmentAPITests(TestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response['Content-Type'], 'application/pdf')
-        self.assertEqual(response.content, raw_pdf)
+        self.assertEqual(b"".join(response.streaming_content), raw_pdf)
+
+    def test_retrieve_legacy_zlib_report(self):
+        task = ReportTask.objects.create(task_id='t7', status=Status.SUCCESS, report_type=ReportType.HTML)
+        raw_html = b"<h2>Legacy</h2>"
+        rpt = GeneratedReport.objects.create(
+            report_task=task,
+            student_id='stu123',
+            namespace='ns',
+            content=zlib.compress(raw_html),
+            content_encoding=ContentEncoding.ZLIB,
+            content_type=ReportType.HTML,
+        )
+        url = reverse('assignment:report_view', args=[task.task_id, rpt.id])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(raw_html, b"".join(response.streaming_content))
+
+
+class ProcessStudentEventsTests(TestCase):
+    def test_students_with_same_unit_sequence_share_result(self):
+        first = StudentSchema.model_validate({
+            "namespace": "ns", "student_id": "a",
+            "events": [
+                {"type": "saved_code", "created_time": "2024-07-21T03:04:55+00:00", "unit": 23},
+                {"type": "submission", "created_time": "2024-07-21T03:10:12+00:00", "unit": 17},
+            ],
+        })
+        second = StudentSchema.model_validate({
+            "namespace": "ns", "student_id": "b",
+            "events": [
+                {"type": "submission", "created_time": "2024-08-02T10:00:00+00:00", "unit": 23},
+                {"type": "saved_code", "created_time": "2024-08-02T10:05:00+00:00", "unit": 17},
+            ],
+        })
+
+        result = process_student_events(first)
+        self.assertEqual(result[1], 'Q2 -> Q1')
+        self.assertIs(process_student_events(second), result)
+
+
+class FormatTimeTests(TestCase):
+    def test_same_instant_keeps_each_utc_offset(self):
+        utc = datetime(2024, 7, 21, 3, 0, tzinfo=timezone.utc)
+        plus_two = datetime(2024, 7, 21, 5, 0, tzinfo=timezone(timedelta(hours=2)))
+
+        self.assertEqual(format_time(utc), '2024-07-21 03:00:00')
+        self.assertEqual(format_time(plus_two), '2024-07-21 05:00:00')
+
+
+class ORJSONRendererTests(TestCase):
+    def setUp(self):
+        self.renderer = ORJSONRenderer()
+
+    def test_none_renders_empty_body(self):
+        self.assertEqual(self.renderer.render(None), b'')
+
+    def test_lazy_translation_renders_as_text(self):
+        self.assertEqual(json.loads(self.renderer.render({'error': gettext_lazy('Not found.')})), {'error': 'Not found.'})
+
+    def test_bytes_render_as_text(self):
+        self.assertEqual(json.loads(self.renderer.render({'input': b'[{"namespace": '})), {'input': '[{"namespace": '})
+
+    def test_unsupported_type_raises_type_error(self):
+        with self.assertRaises(TypeError):
+            self.renderer.render({'value': object()})
+
+    def test_naive_datetime_renders_as_utc(self):
+        rendered = json.loads(self.renderer.render({'at': datetime(2024, 7, 21, 3, 4, 55)}))
+        self.assertEqual(rendered['at'], '2024-07-21T03:04:55+00:00')
+
+    def test_celery_orjson_serializer_round_trip(self):
+        body = ((), {'task_pk': 1, 'report_type': ReportType.HTML}, {'callbacks': None, 'errbacks': None, 'chain': None, 'chord': None})
+        serializer = current_app.conf.task_serializer
+        content_type, content_encoding, data = kombu_dumps(body, serializer=serializer)
+        accept = prepare_accept_content(current_app.conf.accept_content)
+
+        self.assertEqual(serializer, 'orjson')
+        self.assertEqual(content_type, 'application/x-orjson')
+        self.assertEqual(
+            kombu_loads(data, content_type, content_encoding, accept=accept),
+            [[], {'task_pk': 1, 'report_type': 'html'}, {'callbacks': None, 'errbacks': None, 'chain': None, 'chord': None}]
+        )
+
+
+class CompressionTests(TestCase):
+    def test_compress_report_content_from_concurrent_threads(self):
+        payloads = [f"report {i} ".encode('utf-8') * 5000 for i in range(32)]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            compressed = list(executor.map(compress_report_content, payloads))
+
+        self.assertEqual([decompress_report_content(c) for c in compressed], payloads)
+
+
+class GenerateReportTaskTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.payload = [
+            {
+                "namespace": "ns_example",
+                "student_id": f"stu{i}",
+                "events": [
+                    {"type": "saved_code", "created_time": "2024-07-21T03:04:55.939000+00:00", "unit": 17},
+                    {"type": "submission", "created_time": "2024-07-21T03:10:12.001000+00:00", "unit": 23},
+                ]
+            }
+            for i in range(3)
+        ]
+
+    def test_task_stores_one_report_per_student(self):
+        task = ReportTask.objects.create(task_id='t6', status=Status.PENDING, report_type=ReportType.HTML)
+        result = generate_report_task.apply(
+            kwargs={'task_pk': task.pk, 'data': self.payload, 'report_type': ReportType.HTML}
+        ).get()
+
+        self.assertEqual(result['successful_reports'], 3)
+        self.assertEqual(result['failed_reports'], 0)
+        task.refresh_from_db()
+        self.assertEqual(task.status, Status.SUCCESS)
+
+        reports = GeneratedReport.all_objects.filter(report_task=task)
+        self.assertEqual(reports.count(), 3)
+        for rpt in reports:
+            self.assertEqual(rpt.file_size, len(rpt.content))
+
+    def test_task_clears_cached_status_when_finished(self):
+        # The view saves task_id only after apply_async returns, so a fast task
+        # may finish while the row's task_id is still empty.
+        task = ReportTask.objects.create(status=Status.PENDING, report_type=ReportType.HTML)
+        cache.set(task_status_cache_key('t7'), {'status': Status.PENDING, 'report_type': ReportType.HTML})
+        generate_report_task.apply(
+            task_id='t7', kwargs={'task_pk': task.pk, 'data': self.payload, 'report_type': ReportType.HTML}
+        ).get()
+
+        self.assertIsNone(cache.get(task_status_cache_key('t7')))
+
+    @patch('apps.assignment.tasks.cache')
+    def test_task_outcome_does_not_depend_on_cache(self, mock_cache):
+        mock_cache.set.side_effect = ConnectionError('cache down')
+        mock_cache.delete.side_effect = ConnectionError('cache down')
+        task = ReportTask.objects.create(task_id='t10', status=Status.PENDING, report_type=ReportType.HTML)
+
+        result = generate_report_task.apply(
+            task_id='t10', kwargs={'task_pk': task.pk, 'data': self.payload, 'report_type': ReportType.HTML}
+        ).get()
+
+        self.assertEqual(result['successful_reports'], 3)
+        task.refresh_from_db()
+        self.assertEqual(task.status, Status.SUCCESS)
+
+    def test_reports_render_inside_daemonic_worker_process(self):
+        # Celery's prefork pool runs tasks in daemonic billiard processes.
+        students = StudentListAdapter.validate_python(self.payload)
+        pool = Pool(1)
+        try:
+            results = pool.apply(_render_reports, (students, ReportType.HTML))
+        finally:
+            pool.terminate()
+
+        self.assertEqual([student_id for student_id, _, _ in results], ['stu0', 'stu1', 'stu2'])
+        for _, _, compressed in results:
+            self.assertIsNotNone(compressed)
+
+    def test_task_accepts_json_payload(self):
+        task = ReportTask.objects.create(task_id='t8', status=Status.PENDING, report_type=ReportType.PDF)
+        result = generate_report_task.apply(
+            kwargs={'task_pk': task.pk, 'data': json.dumps(self.payload), 'report_type': ReportType.PDF}
+        ).get()
+
+        self.assertEqual(result['successful_reports'], 3)
+        self.assertEqual(GeneratedReport.objects.filter(report_task=task).count(), 3)
+
+    def test_task_loads_and_clears_stored_payload(self):
+        task = ReportTask.objects.create(
+            task_id='t9',
+            status=Status.PENDING,
+            report_type=ReportType.HTML,
+            payload=compress_report_content(json.dumps(self.payload).encode('utf-8')),
+        )
+        result = generate_report_task.apply(
+            kwargs={'task_pk': task.pk, 'report_type': ReportType.HTML}
+        ).get()
+
+        self.assertEqual(result['successful_reports'], 3)
+        self.assertIsNone(ReportTask.all_objects.get(pk=task.pk).payload)
+
+
+class ChordRenderTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.payload = [
+            {
+                "namespace": "ns_example",
+                "student_id": f"stu{i}",
+                "events": [
+                    {"type": "saved_code", "created_time": "2024-07-21T03:04:55.939000+00:00", "unit": 17},
+                    {"type": "submission", "created_time": "2024-07-21T03:10:12.001000+00:00", "unit": 23},
+                ]
+            }
+            for i in range(2)
+        ]
+        eager = current_app.conf.task_always_eager
+        current_app.conf.task_always_eager = True
+        self.addCleanup(setattr, current_app.conf, 'task_always_eager', eager)
+
+    @override_settings(REPORT_RENDER_USE_CHORD=True)
+    def test_chord_renders_and_stores_reports(self):
+        task = ReportTask.objects.create(task_id='c1', status=Status.PENDING, report_type=ReportType.PDF)
+        result = generate_report_task.apply(
+            kwargs={'task_pk': task.pk, 'data': self.payload, 'report_type': ReportType.PDF}
+        ).get()
+
+        self.assertEqual(result['dispatched_reports'], 2)
+        task.refresh_from_db()
+        self.assertEqual(task.status, Status.SUCCESS)
+        self.assertEqual(GeneratedReport.objects.filter(report_task=task).count(), 2)
+
+    def test_render_student_reports_invalid_payload_as_failed(self):
+        result = render_student.apply(args=({"student_id": "stu0", "namespace": "ns"}, ReportType.HTML)).get()
+
+        self.assertEqual(result['student_id'], 'stu0')
+        self.assertIsNone(result['content_b64'])
+
+    def test_finalize_reports_stores_rendered_results(self):
+        task = ReportTask.objects.create(task_id='c2', status=Status.STARTED, report_type=ReportType.HTML)
+        rendered = render_student.apply(args=(self.payload[0], ReportType.HTML)).get()
+        failed = {"student_id": "stu1", "namespace": "ns_example", "content_type": ReportType.HTML, "content_b64": None}
+
+        result = finalize_reports.apply(args=([rendered, failed], task.pk, ReportType.HTML)).get()
+
+        self.assertEqual(result['successful_reports'], 1)
+        self.assertEqual(result['failed_reports'], 1)
+        self.assertEqual(GeneratedReport.objects.get(report_task=task).student_id, 'stu0')
+
+    def test_chord_error_callback_marks_task_failed(self):
+        task = ReportTask.objects.create(
+            task_id='c3', status=Status.STARTED, report_type=ReportType.HTML, payload=b'stored'
+        )
+        cache.set(task_status_cache_key('c3'), {'status': Status.STARTED, 'report_type': ReportType.HTML})
+        fail_report_task(None, RuntimeError('worker lost'), None, task.pk, 'c3')
+
+        task = ReportTask.all_objects.get(pk=task.pk)
+        self.assertEqual(task.status, Status.FAILURE)
+        self.assertIn('worker lost', task.error_message)
+        self.assertIsNone(task.payload)
+        self.assertIsNone(cache.get(task_status_cache_key('c3')))
@@ -1,8 +1,11 @@
 import zlib
 import logging
+import threading
+import zstandard as zstd
 from io import BytesIO
 from datetime import datetime
-from typing import Dict, List, Any, Tuple
+from functools import lru_cache
+from typing import Dict, Any, Tuple, Iterator
 
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
@@ -17,168 +20,259 @@ from reportlab.platypus import (
     TableStyle,
 )
 
+from .models import ContentEncoding
+from .schemas import EventSchema, StudentSchema
+
 logger = logging.getLogger(__name__)
 
+# Compressor contexts are not thread-safe, and compression runs both in
+# Celery workers and in the web process (request payloads), which may serve
+# requests from several threads; each thread gets its own context.
+_ZSTD_LOCAL = threading.local()
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# ReportLab styles are only read while a document is built, so one set is
+# shared by every PDF report.
+_STYLES = getSampleStyleSheet()
+
+_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+])
+
+_FOOTER_STYLE = ParagraphStyle('Footer', parent=_STYLES['Normal'], alignment=1, fontSize=8)
+
+_HTML_ROW_TEMPLATE = '<tr><td>{i}</td><td>{q}</td><td>{u}</td><td>{t}</td><td>{ts}</td></tr>'
+
+# Static parts of the HTML report; only the placeholders are filled per report.
+_HTML_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+    <title>Student Report - {student_id}</title>
+"""
+
+_HTML_STYLE = """    <style>
+        body {
+            font-family: Arial, sans-serif;
+            max-width: 800px;
+            margin: 0 auto;
+            padding: 20px;
+        }
+        h1 {
+            color: #2c3e50;
+            border-bottom: 2px solid #3498db;
+            padding-bottom: 10px;
+        }
+        .info-box {
+            background-color: #f8f9fa;
+            border: 1px solid #dee2e6;
+            border-radius: 5px;
+            padding: 15px;
+            margin-bottom: 20px;
+        }
+        table {
+            width: 100%;
+            border-collapse: collapse;
+        }
+        table, th, td {
+            border: 1px solid #dee2e6;
+        }
+        th {
+            background-color: #f2f2f2;
+            padding: 12px;
+        }
+        td {
+            padding: 10px;
+        }
+        tr:nth-child(even) {
+            background-color: #f8f9fa;
+        }
+        .footer {
+            margin-top: 40px;
+            font-size: 0.8em;
+            text-align: center;
+            color: #7f8c8d;
+        }
+    </style>
+</head>
+"""
+
+_HTML_PRE_TABLE = """<body>
+    <h1>Student Activity Report</h1>
+
+    <div class="info-box">
+        <h2>Student Information</h2>
+        <p><strong>Student ID:</strong> {student_id}</p>
+        <p><strong>Namespace:</strong> {namespace}</p>
+        <p><strong>Number of Events:</strong> {num_events}</p>
+    </div>
+
+    <div class="info-box">
+        <h2>Event Summary</h2>
+        <p><strong>Event Order:</strong> {event_order}</p>
+    </div>
+
+    <h2>Detailed Event Timeline</h2>
+    <table>
+        <thead>
+            <tr>
+                <th>#</th>
+                <th>Question</th>
+                <th>Unit ID</th>
+                <th>Event Type</th>
+                <th>Timestamp</th>
+            </tr>
+        </thead>
+        <tbody>
+"""
+
+_HTML_POST_TABLE = """
+        </tbody>
+    </table>
 
-def process_student_events(student_data: Dict[str, Any]) -> Tuple[Dict[int, str], str, List[Dict[str, Any]]]:
+    <div class="footer">
+        <p>Report generated on {now}</p>
+    </div>
+</body>
+</html>
+"""
+
+
+def _zstd_compressor() -> zstd.ZstdCompressor:
+    """
+    Returns the calling thread's zstd compressor, creating it on first use.
+
+    Returns:
+        ZstdCompressor at level 3 owned by the current thread
+    """
+    cctx = getattr(_ZSTD_LOCAL, 'compressor', None)
+    if cctx is None:
+        cctx = _ZSTD_LOCAL.compressor = zstd.ZstdCompressor(level=3)
+    return cctx
+
+
+def process_student_events(student: StudentSchema) -> Tuple[Dict[int, str], str, Tuple[str, ...]]:
     """
     Process student events data to generate question aliases and event order.
 
+    Aliases depend only on the sequence of unit IDs, so results are memoized
+    on that sequence and shared by every student who visited the same units
+    in the same order; callers must treat them as read-only.
+
     Args:
-        student_data: Dictionary containing student data and events
+        student: Validated student data and events
 
     Returns:
         Tuple containing:
         - Dictionary mapping unit IDs to question aliases (e.g. {17: 'Q1', 23: 'Q2'})
         - String representing the event order (e.g. 'Q1 -> Q2 -> Q1')
-        - List of events with added question aliases
+        - Question alias of each event, in the same order as student.events
     """
     try:
-        events = student_data.get('events', [])
-        unit_ids = sorted(set(event['unit'] for event in events))
-        aliases = {unit_id: f"Q{i + 1}" for i, unit_id in enumerate(unit_ids)}
-
-        event_order = []
-        processed_events = []
-
-        for event in events:
-            alias = aliases[event['unit']]
-            event_with_alias = {**event, 'question_alias': alias}
-            processed_events.append(event_with_alias)
-            event_order.append(alias)
-
-        order_string = " -> ".join(event_order)
-        return aliases, order_string, processed_events
+        return _process_events(tuple(event.unit for event in student.events))
 
     except Exception as e:
         logger.error(f"Error processing student events: {str(e)}")
         raise ValueError(f"Failed to process student events: {str(e)}")
 
 
-def generate_html_report(student_data: Dict[str, Any], event_order: str) -> str:
+@lru_cache(maxsize=4096)
+def _process_events(units: Tuple[int, ...]) -> Tuple[Dict[int, str], str, Tuple[str, ...]]:
+    # Only the distinct unit IDs are sorted; the per-event aliases line up
+    # with the events, so the renderers zip them instead of copying events.
+    unit_ids = sorted(set(units))
+    aliases = {unit_id: f"Q{i}" for i, unit_id in enumerate(unit_ids, start=1)}
+
+    aliases_per_event = tuple(aliases[unit] for unit in units)
+    order_string = " -> ".join(aliases_per_event)
+    return aliases, order_string, aliases_per_event
+
+
+def format_time(ts: Any) -> str:
+    """
+    Formats an event timestamp for display in a report.
+
+    Memoized because the HTML and PDF generators format every event and
+    timestamps repeat across reports.
+
+    Args:
+        ts: datetime or ISO 8601 string
+
+    Returns:
+        Timestamp formatted as 'YYYY-MM-DD HH:MM:SS', or the input as a string
+        if it cannot be parsed
+    """
+    if ts.__class__ is str:
+        return _format_time(ts, None)
+    try:
+        offset = ts.utcoffset()
+    except AttributeError:
+        return str(ts)
+    return _format_time(ts, offset)
+
+
+@lru_cache(maxsize=4096)
+def _format_time(ts: Any, offset: Any) -> str:
+    # The UTC offset is part of the key: aware datetimes for the same instant
+    # compare and hash equal even when their wall-clock times differ.
+    if ts.__class__ is str:
+        iso = ts[:-1] + '+00:00' if ts.endswith('Z') else ts
+        try:
+            return datetime.fromisoformat(iso).strftime(_TIME_FORMAT)
+        except ValueError:
+            return ts
+    return ts.strftime(_TIME_FORMAT)
+
+
+def generate_html_report(student: StudentSchema, event_order: str) -> bytes:
     """
     Generates an HTML report for the given student data and event order.
 
     Args:
-        student_data: Dictionary containing student data
+        student: Validated student data and events
         event_order: String representing the order of events
 
     Returns:
-        HTML string containing the formatted report
+        UTF-8 encoded HTML document containing the formatted report
     """
     try:
-        student_id = student_data['student_id']
-        namespace = student_data['namespace']
-        events = student_data.get('events', [])
-
-        _, _, processed_events = process_student_events(student_data)
-
-        def format_time(ts):
-            try:
-                if isinstance(ts, str):
-                    return datetime.fromisoformat(ts.replace('Z', '+00:00')).strftime('%Y-%m-%d %H:%M:%S')
-                return ts.strftime('%Y-%m-%d %H:%M:%S')
-            except Exception:
-                return ts
-
-        event_rows = "\n".join(
-            f"""
-            <tr>
-                <td>{i+1}</td>
-                <td>{event['question_alias']}</td>
-                <td>{event['unit']}</td>
-                <td>{event['type']}</td>
-                <td>{format_time(event['created_time'])}</td>
-            </tr>
-            """ for i, event in enumerate(processed_events)
-        )
-
-        return f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Student Report - {student_id}</title>
-            <style>
-                body {{
-                    font-family: Arial, sans-serif;
-                    max-width: 800px;
-                    margin: 0 auto;
-                    padding: 20px;
-                }}
-                h1 {{
-                    color: #2c3e50;
-                    border-bottom: 2px solid #3498db;
-                    padding-bottom: 10px;
-                }}
-                .info-box {{
-                    background-color: #f8f9fa;
-                    border: 1px solid #dee2e6;
-                    border-radius: 5px;
-                    padding: 15px;
-                    margin-bottom: 20px;
-                }}
-                table {{
-                    width: 100%;
-                    border-collapse: collapse;
-                }}
-                table, th, td {{
-                    border: 1px solid #dee2e6;
-                }}
-                th {{
-                    background-color: #f2f2f2;
-                    padding: 12px;
-                }}
-                td {{
-                    padding: 10px;
-                }}
-                tr:nth-child(even) {{
-                    background-color: #f8f9fa;
-                }}
-                .footer {{
-                    margin-top: 40px;
-                    font-size: 0.8em;
-                    text-align: center;
-                    color: #7f8c8d;
-                }}
-            </style>
-        </head>
-        <body>
-            <h1>Student Activity Report</h1>
-
-            <div class="info-box">
-                <h2>Student Information</h2>
-                <p><strong>Student ID:</strong> {student_id}</p>
-                <p><strong>Namespace:</strong> {namespace}</p>
-                <p><strong>Number of Events:</strong> {len(events)}</p>
-            </div>
-
-            <div class="info-box">
-                <h2>Event Summary</h2>
-                <p><strong>Event Order:</strong> {event_order}</p>
-            </div>
-
-            <h2>Detailed Event Timeline</h2>
-            <table>
-                <thead>
-                    <tr>
-                        <th>#</th>
-                        <th>Question</th>
-                        <th>Unit ID</th>
-                        <th>Event Type</th>
-                        <th>Timestamp</th>
-                    </tr>
-                </thead>
-                <tbody>
-                    {event_rows}
-                </tbody>
-            </table>
-
-            <div class="footer">
-                <p>Report generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-            </div>
-        </body>
-        </html>
-        """
+        student_id = student.student_id
+        namespace = student.namespace
+        events = student.events
+
+        _, _, aliases_per_event = process_student_events(student)
+
+        fmt = _HTML_ROW_TEMPLATE.format
+        event_rows = "\n".join([
+            fmt(
+                i=i,
+                q=alias,
+                u=event.unit,
+                t=event.type,
+                ts=format_time(event.created_time)
+            )
+            for i, (alias, event) in enumerate(zip(aliases_per_event, events), start=1)
+        ])
+
+        return "".join([
+            _HTML_HEAD.format(student_id=student_id),
+            _HTML_STYLE,
+            _HTML_PRE_TABLE.format(
+                student_id=student_id,
+                namespace=namespace,
+                num_events=len(events),
+                event_order=event_order
+            ),
+            event_rows,
+            _HTML_POST_TABLE.format(now=datetime.now().strftime(_TIME_FORMAT)),
+        ]).encode('utf-8')
 
     except Exception as e:
         logger.error(f"Error generating HTML report: {str(e)}")
@@ -188,15 +282,15 @@ def generate_html_report(student_data: Dict[str, Any], event_order: str) -> str:
         <h1>Error Generating Report</h1>
         <p>{str(e)}</p>
         </body></html>
-        """
+        """.encode('utf-8')
 
 
-def generate_pdf_report(student_data: Dict[str, Any], event_order: str) -> bytes:
+def generate_pdf_report(student: StudentSchema, event_order: str) -> bytes:
     """
     Generates a PDF report for the given student data and event order.
 
     Args:
-        student_data: Dictionary containing student data
+        student: Validated student data and events
         event_order: String representing the order of events
 
     Returns:
@@ -205,64 +299,43 @@ def generate_pdf_report(student_data: Dict[str, Any], event_order: str) -> bytes
     try:
         buffer = BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
 
-        student_id = student_data['student_id']
-        namespace = student_data['namespace']
-        _, _, processed_events = process_student_events(student_data)
+        student_id = student.student_id
+        namespace = student.namespace
+        events = student.events
+        _, _, aliases_per_event = process_student_events(student)
 
         elements = [
-            Paragraph("Student Activity Report", styles['Heading1']),
+            Paragraph("Student Activity Report", _STYLES['Heading1']),
             Spacer(1, 0.25 * inch),
-            Paragraph("Student Information", styles['Heading2']),
-            Paragraph(f"<b>Student ID:</b> {student_id}", styles['Normal']),
-            Paragraph(f"<b>Namespace:</b> {namespace}", styles['Normal']),
-            Paragraph(f"<b>Number of Events:</b> {len(processed_events)}", styles['Normal']),
+            Paragraph("Student Information", _STYLES['Heading2']),
+            Paragraph(f"<b>Student ID:</b> {student_id}", _STYLES['Normal']),
+            Paragraph(f"<b>Namespace:</b> {namespace}", _STYLES['Normal']),
+            Paragraph(f"<b>Number of Events:</b> {len(events)}", _STYLES['Normal']),
             Spacer(1, 0.2 * inch),
-            Paragraph("Event Summary", styles['Heading2']),
-            Paragraph(f"<b>Event Order:</b> {event_order}", styles['Normal']),
+            Paragraph("Event Summary", _STYLES['Heading2']),
+            Paragraph(f"<b>Event Order:</b> {event_order}", _STYLES['Normal']),
             Spacer(1, 0.2 * inch),
-            Paragraph("Detailed Event Timeline", styles['Heading2']),
+            Paragraph("Detailed Event Timeline", _STYLES['Heading2']),
         ]
 
         table_data = [['#', 'Question', 'Unit ID', 'Event Type', 'Timestamp']]
-        for i, event in enumerate(processed_events):
-            try:
-                ts = event['created_time']
-                if isinstance(ts, str):
-                    ts = datetime.fromisoformat(ts.replace('Z', '+00:00')).strftime('%Y-%m-%d %H:%M:%S')
-                else:
-                    ts = ts.strftime('%Y-%m-%d %H:%M:%S')
-            except Exception:
-                ts = str(event['created_time'])
-
-            table_data.append([
-                str(i + 1),
-                event['question_alias'],
-                str(event['unit']),
-                event['type'],
-                ts
-            ])
+        table_data.extend(
+            [str(i), alias, str(event.unit), event.type, format_time(event.created_time)]
+            for i, (alias, event) in enumerate(zip(aliases_per_event, events), start=1)
+        )
 
         table = Table(table_data, repeatRows=1)
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ]))
+        table.setStyle(_TABLE_STYLE)
         elements.append(table)
         elements.append(Spacer(1, 0.5 * inch))
         elements.append(Paragraph(
-            f"Report generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-            ParagraphStyle('Footer', parent=styles['Normal'], alignment=1, fontSize=8)
+            f"Report generated on {datetime.now().strftime(_TIME_FORMAT)}",
+            _FOOTER_STYLE
         ))
 
         doc.build(elements)
-        buffer.seek(0)
-        return buffer.read()
+        return buffer.getvalue()
 
     except Exception as e:
         logger.error(f"Error generating PDF report: {str(e)}")
@@ -275,13 +348,33 @@ def generate_pdf_report(student_data: Dict[str, Any], event_order: str) -> bytes
         c.drawString(100, 680, f"An error occurred: {str(e)}")
         c.showPage()
         c.save()
-        buffer.seek(0)
-        return buffer.read()
+        return buffer.getvalue()
+
 
+def warm_pdf_renderer() -> None:
+    """
+    Renders a throwaway PDF so ReportLab loads its fonts, encodings and
+    paragraph machinery once per process instead of on the first real report.
+
+    Called by the _warm_renderers worker_process_init handler in tasks.py,
+    so it runs once in each prefork worker child, which then renders its
+    reports serially with the warmed state.
+    """
+    try:
+        generate_pdf_report(
+            StudentSchema(
+                student_id='warmup',
+                namespace='warmup',
+                events=[EventSchema(type='saved_code', unit=0, created_time=datetime.now())],
+            ),
+            'Q1'
+        )
+    except Exception as e:
+        logger.warning(f"PDF renderer warm-up failed: {str(e)}")
 
 def compress_report_content(report_content: bytes) -> bytes:
     """
-    Compresses the report content using zlib to save storage space.
+    Compresses the report content using zstd to save storage space.
 
     Args:
         report_content: Raw bytes of the report content
@@ -290,24 +383,49 @@ def compress_report_content(report_content: bytes) -> bytes:
         Compressed bytes
     """
     try:
-        return zlib.compress(report_content, level=9)
+        return _zstd_compressor().compress(report_content)
     except Exception as e:
         logger.error(f"Compression failed: {str(e)}")
         raise ValueError(f"Failed to compress report content: {str(e)}")
 
 
-def decompress_report_content(compressed_content: bytes) -> bytes:
+def iter_report_chunks(report_content: bytes, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Splits report content into chunks for a streaming HTTP response.
+
+    Chunks are memoryview slices, so no part of the report is copied.
+
+    Args:
+        report_content: Encoded HTML or raw PDF bytes
+        chunk_size: Maximum number of bytes per chunk
+
+    Returns:
+        Iterator over byte chunks of the report content
+    """
+    view = memoryview(report_content)
+    for start in range(0, len(view), chunk_size):
+        yield view[start:start + chunk_size]
+
+
+def decompress_report_content(compressed_content: bytes, encoding: str = ContentEncoding.ZSTD) -> bytes:
     """
-    Decompresses the report content that was previously compressed with zlib.
+    Decompresses the report content that was previously compressed with the given codec.
 
     Args:
         compressed_content: Compressed bytes from the database
+        encoding: Codec the content was compressed with (zstd, or zlib for legacy reports)
 
     Returns:
         Decompressed bytes of the original report content
     """
     try:
-        return zlib.decompress(compressed_content)
-    except zlib.error as e:
+        if encoding == ContentEncoding.ZLIB:
+            return zlib.decompress(compressed_content)
+        dctx = zstd.ZstdDecompressor()
+        if zstd.frame_content_size(compressed_content) != -1:
+            return dctx.decompress(compressed_content)
+        # Frames streamed without a known size need a decompression object.
+        return dctx.decompressobj().decompress(compressed_content)
+    except (zlib.error, zstd.ZstdError) as e:
         logger.error(f"Decompression failed: {str(e)}")
         raise ValueError(f"Failed to decompress report content: {str(e)}")
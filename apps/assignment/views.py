@@ -1,43 +1,79 @@
+from django.core.cache import cache
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.exceptions import ValidationError
+from pydantic import ValidationError
 import logging
 
 from .models import ReportTask, Status, ReportType, GeneratedReport
-from .serializers import StudentDataSerializer
-from .tasks import generate_report_task
-from .utils import decompress_report_content
+from .schemas import StudentListAdapter
+from .tasks import cache_task_status, generate_report_task, get_cached_task_status
+from .utils import compress_report_content, decompress_report_content, iter_report_chunks
 
 logger = logging.getLogger(__name__)
 
+_VALID_REPORT_TYPES = frozenset(choice.value for choice in ReportType)
+_VALID_REPORT_TYPES_STR = ", ".join(sorted(_VALID_REPORT_TYPES))
+
+_REPORT_MEDIA_TYPES = {
+    ReportType.HTML: 'text/html',
+    ReportType.PDF: 'application/pdf',
+}
+
+# How long decompressed report content stays cached for repeated downloads (seconds).
+_REPORT_CACHE_TIMEOUT = 3600
+
+# Larger reports are always read from the database, so they cannot evict
+# the short-lived status entries from the cache.
+_REPORT_CACHE_MAX_SIZE = 1024 * 1024
+
+_IN_PROGRESS_STATUSES = frozenset({Status.PENDING, Status.STARTED, Status.RETRY})
+
+# Pending statuses read from the database are cached briefly, so clients
+# polling a task that has not started yet share one query.
+_PENDING_STATUS_CACHE_TIMEOUT = 5
+
+
+def _in_progress_response(task_status: str) -> Response:
+    return Response(
+        {
+            'status': task_status,
+            'message': f"Report generation is {task_status.lower()}. Please check back later."
+        },
+        status=status.HTTP_202_ACCEPTED
+    )
+
+
 class GenerateReportView(APIView):
     """
     Initiates asynchronous report generation for student event data.
     """
     def post(self, request, report_type):
-        valid_types = [choice.value for choice in ReportType]
-        if report_type not in valid_types:
+        if report_type not in _VALID_REPORT_TYPES:
             return Response(
-                {'error': f"Invalid report_type. Must be one of: {', '.join(valid_types)}."},
+                {'error': f"Invalid report_type. Must be one of: {_VALID_REPORT_TYPES_STR}."},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
         try:
-            serializer = StudentDataSerializer(data=request.data, many=True)
-            serializer.is_valid(raise_exception=True)
-            validated_data = serializer.validated_data
+            if request.content_type.startswith('application/json'):
+                # Parse and validate the raw body in one pass inside pydantic-core.
+                students = StudentListAdapter.validate_json(request.body)
+            else:
+                students = StudentListAdapter.validate_python(request.data)
         except ValidationError as e:
-            return Response({'error': 'Invalid data format', 'details': e.detail}, 
+            return Response({'error': 'Invalid data format', 'details': e.errors(include_url=False, include_context=False, include_input=False)},
                             status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            report_task = ReportTask.objects.create(status=Status.PENDING, report_type=report_type)
+            # The payload travels through the database, not the broker.
+            payload = compress_report_content(StudentListAdapter.dump_json(students))
+            report_task = ReportTask.objects.create(status=Status.PENDING, report_type=report_type, payload=payload)
             async_result = generate_report_task.apply_async(
-                kwargs={'task_pk': report_task.pk, 'data': validated_data, 'report_type': report_type}
+                kwargs={'task_pk': report_task.pk, 'report_type': report_type}
             )
             report_task.task_id = async_result.id
             report_task.save(update_fields=["task_id"])
@@ -68,24 +104,22 @@ class ReportStatusView(APIView):
     Checks the status of a report generation task and returns the result if completed.
     """
     def get(self, request, report_type, task_id):
-        valid_types = [choice.value for choice in ReportType]
-        if report_type not in valid_types:
+        if report_type not in _VALID_REPORT_TYPES:
             return Response(
-                {'error': f"Invalid report_type. Must be one of: {', '.join(valid_types)}."},
+                {'error': f"Invalid report_type. Must be one of: {_VALID_REPORT_TYPES_STR}."},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
         try:
+            cached = get_cached_task_status(task_id)
+            if cached is not None and cached['report_type'] == report_type:
+                return _in_progress_response(cached['status'])
+
             task = get_object_or_404(ReportTask, task_id=task_id, report_type=report_type)
 
-            if task.status in {Status.PENDING, Status.STARTED, Status.RETRY}:
-                return Response(
-                    {
-                        'status': task.status,
-                        'message': f"Report generation is {task.status.lower()}. Please check back later."
-                    }, 
-                    status=status.HTTP_202_ACCEPTED
-                )
+            if task.status in _IN_PROGRESS_STATUSES:
+                cache_task_status(task_id, task.status, task.report_type, _PENDING_STATUS_CACHE_TIMEOUT)
+                return _in_progress_response(task.status)
 
             if task.status == Status.FAILURE:
                 return Response(
@@ -105,16 +139,9 @@ class ReportStatusView(APIView):
                     status=status.HTTP_410_GONE
                 )
 
-            reports_qs = GeneratedReport.objects.filter(report_task=task, content_type=report_type)
-            if not reports_qs.exists():
-                return Response(
-                    {
-                        'status': task.status,
-                        'error': 'No reports found even though task completed successfully.'
-                    }, 
-                    status=status.HTTP_404_NOT_FOUND
-                )
-
+            reports_qs = GeneratedReport.objects.filter(report_task=task, content_type=report_type).only(
+                'id', 'student_id', 'namespace', 'generated_at'
+            )
             reports = [
                 {
                     'id': rpt.id,
@@ -125,9 +152,18 @@ class ReportStatusView(APIView):
                         reverse('assignment:report_view', args=[task.task_id, rpt.id])
                     )
                 }
-                for rpt in reports_qs
+                for rpt in reports_qs.iterator(chunk_size=500)
             ]
 
+            if not reports:
+                return Response(
+                    {
+                        'status': task.status,
+                        'error': 'No reports found even though task completed successfully.'
+                    }, 
+                    status=status.HTTP_404_NOT_FOUND
+                )
+
             return Response(
                 {
                     'status': task.status, 
@@ -148,45 +184,64 @@ class ReportStatusView(APIView):
             )
 
 
+def _get_cached_report(cache_key: str):
+    # Downloads work without the cache; any error is treated as a miss.
+    try:
+        return cache.get(cache_key)
+    except Exception as e:
+        logger.warning(f"Could not read cached report {cache_key}: {str(e)}")
+        return None
+
+
+def _cache_report(cache_key: str, report: tuple):
+    try:
+        cache.set(cache_key, report, _REPORT_CACHE_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"Could not cache report {cache_key}: {str(e)}")
+
+
 class ReportView(APIView):
     """
     Returns the content of a generated report as HTML or PDF.
     """
     def get(self, request, task_id, report_id):
         try:
-            report = get_object_or_404(GeneratedReport, report_task__task_id=task_id, id=report_id)
-            filename = f"Report-{report.student_id}.{report.content_type}"
-
-            try:
-                raw_data = decompress_report_content(report.content)
-            except Exception as e:
-                logger.error(f"Decompression failed for report {report_id}: {str(e)}")
-                return Response(
-                    {'error': f"Failed to decompress report content: {str(e)}"},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            cache_key = f"rpt:{task_id}:{report_id}"
+            cached = _get_cached_report(cache_key)
+
+            if cached is None:
+                report = get_object_or_404(
+                    GeneratedReport.all_objects.only('student_id', 'content', 'content_encoding', 'content_type'),
+                    report_task__task_id=task_id,
+                    id=report_id
                 )
 
-            if report.content_type == ReportType.HTML:
                 try:
-                    data = raw_data.decode('utf-8')
-                    resp = HttpResponse(data, content_type='text/html')
-                    resp['Content-Disposition'] = f'inline; filename="{filename}"'
-                except UnicodeDecodeError as e:
-                    logger.error(f"Unicode decode error for HTML report {report_id}: {str(e)}")
+                    raw_data = decompress_report_content(report.content, report.content_encoding)
+                except Exception as e:
+                    logger.error(f"Decompression failed for report {report_id}: {str(e)}")
                     return Response(
-                        {'error': f"Failed to decode HTML content: {str(e)}"},
+                        {'error': f"Failed to decompress report content: {str(e)}"},
                         status=status.HTTP_500_INTERNAL_SERVER_ERROR
                     )
 
-            elif report.content_type == ReportType.PDF:
-                resp = HttpResponse(raw_data, content_type='application/pdf')
-                resp['Content-Disposition'] = f'inline; filename="{filename}"'
+                if report.content_type not in _REPORT_MEDIA_TYPES:
+                    return Response(
+                        {'error': f"Unsupported report type: {report.content_type}"},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
 
-            else:
-                return Response(
-                    {'error': f"Unsupported report type: {report.content_type}"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+                # Generated reports never change, so the decompressed bytes can be reused.
+                cached = (report.student_id, report.content_type, raw_data)
+                if len(raw_data) <= _REPORT_CACHE_MAX_SIZE:
+                    _cache_report(cache_key, cached)
+
+            student_id, report_type, raw_data = cached
+            filename = f"Report-{student_id}.{report_type}"
+
+            resp = StreamingHttpResponse(iter_report_chunks(raw_data), content_type=_REPORT_MEDIA_TYPES[report_type])
+            resp['Content-Length'] = str(len(raw_data))
+            resp['Content-Disposition'] = f'inline; filename="{filename}"'
 
             return resp
         except Exception as e:
@@ -1,8 +1,19 @@
 import os
+import orjson
 from celery import Celery
+from kombu.serialization import register
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
+# Task and result payloads are encoded with orjson rather than the stdlib json module
+register(
+    'orjson',
+    orjson.dumps,
+    orjson.loads,
+    content_type='application/x-orjson',
+    content_encoding='binary',
+)
+
 celery = Celery('core')
 
 celery.config_from_object('django.conf:settings', namespace='CELERY')
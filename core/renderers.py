@@ -0,0 +1,35 @@
+import orjson
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework.renderers import BaseRenderer
+
+
+def _default(obj):
+    """
+    Fallback for values orjson does not serialize natively.
+
+    Args:
+        obj: The value orjson could not encode.
+
+    Returns:
+        str: The text of a lazy translation string or byte string.
+    """
+    if isinstance(obj, Promise):
+        return force_str(obj)
+    if isinstance(obj, bytes):
+        return obj.decode('utf-8', errors='replace')
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    Renders API responses to JSON using orjson instead of the stdlib encoder.
+    """
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return orjson.dumps(data, default=_default, option=orjson.OPT_NAIVE_UTC)
@@ -51,6 +51,14 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'core.wsgi.application'
 
+# Django REST framework
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
 # Database configuration (PostgreSQL)
 DATABASES = {
     "default": {
@@ -66,6 +74,12 @@ DATABASES = {
 # Celery configuration
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
+CELERY_TASK_SERIALIZER = 'orjson'
+CELERY_RESULT_SERIALIZER = 'orjson'
+CELERY_ACCEPT_CONTENT = ['orjson', 'json']
+
+# Fan report rendering out to one Celery subtask per student (requires a result backend)
+REPORT_RENDER_USE_CHORD = os.getenv('REPORT_RENDER_USE_CHORD', '0') == '1'
 
 REDIS_URL = os.getenv('REDIS_URL', 'redis://redis:6379/0')
 